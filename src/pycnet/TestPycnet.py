@@ -102,7 +102,7 @@ def main():
             print("\n\npycnet appears to be working correctly. Hooray!\n")
             rm_temp_dirs = input("Remove files and folders created for this test? [Y/n] ")
             if rm_temp_dirs.upper() != "N":
-                os.system("rmdir /s /q {0}".format(test_dir))
+                shutil.rmtree(test_dir, ignore_errors=True)
     else:
         print("Did not find output file {0}.".format(os.path.basename(kscope_file_path)))
         exit()
@@ -20,49 +20,30 @@ def main():
     Run with the -h (help) flag, e.g. 'pycnet -h', to see all options.
     """
 
-    valid_modes = ["process", "spectro", "predict", "review", "inventory", "rename", "cleanup"]
-
     args = pycnet.process.parsePycnetArgs()
 
-    if not args.mode in valid_modes:
+    show_prog = not args.quiet_mode
+    proc_kwargs = {"log_to_file": args.log_to_file, "cleanup": args.auto_cleanup}
+    model_kwargs = {"review_settings": args.review_settings, "output_file": args.output_file, "batch_size": args.batch_size, "use_fp16": args.use_fp16, "use_xla": args.use_xla, "cache_file": args.cache_file, "stream_scores": args.stream_scores}
+
+    # Maps each mode to the function that performs it and its arguments.
+    mode_funcs = {
+        "process": (pycnet.process.processFolder, [args.mode, args.target_dir, args.cnet_version, args.image_dir, args.n_workers], dict(show_prog=show_prog, **model_kwargs, **proc_kwargs)),
+        "spectro": (pycnet.process.processFolder, [args.mode, args.target_dir, args.cnet_version, args.image_dir, args.n_workers], dict(show_prog=show_prog, **proc_kwargs)),
+        "predict": (pycnet.process.processFolder, [args.mode, args.target_dir, args.cnet_version, args.image_dir], dict(show_prog=show_prog, **model_kwargs, **proc_kwargs)),
+        "review": (pycnet.process.processFolder, [args.mode, args.target_dir, args.cnet_version], dict(review_settings=args.review_settings, output_file=args.output_file, **proc_kwargs)),
+        "inventory": (pycnet.file.inventoryFolder, [args.target_dir], {}),
+        "rename": (pycnet.file.massRenameFiles, [args.target_dir, "wav"], {}),
+        "cleanup": (pycnet.file.removeSpectroDir, [args.target_dir, args.image_dir], {})
+    }
+
+    if not args.mode in mode_funcs:
         print("\nMode '{0}' not recognized. Please use one of the following options:".format(args.mode))
-        print('\n'.join(valid_modes))
+        print('\n'.join(mode_funcs))
 
     else:
-        show_prog = not args.quiet_mode
-        auto_cleanup = args.auto_cleanup
-        log_to_file = args.log_to_file
-        
-        if args.mode == "process":
-            proc_args = [args.mode, args.target_dir, args.cnet_version, args.image_dir, args.n_workers]
-            pycnet.process.processFolder(*proc_args, review_settings=args.review_settings, output_file=args.output_file, log_to_file=log_to_file, show_prog=show_prog, cleanup=auto_cleanup)
-
-        elif args.mode == "spectro":
-            spectro_args = [args.mode, args.target_dir, args.cnet_version, args.image_dir, args.n_workers]
-            pycnet.process.processFolder(*spectro_args, log_to_file=log_to_file, show_prog=show_prog, cleanup=auto_cleanup)
-
-        elif args.mode == "predict":
-            predict_args = [args.mode, args.target_dir, args.cnet_version, args.image_dir]
-            pycnet.process.processFolder(*predict_args, review_settings=args.review_settings, show_prog=show_prog, output_file=args.output_file, log_to_file=log_to_file, cleanup=auto_cleanup)
-
-        elif args.mode == "review":
-            review_args = [args.mode, args.target_dir, args.cnet_version]
-            pycnet.process.processFolder(*review_args, review_settings=args.review_settings, output_file=args.output_file, log_to_file=log_to_file, cleanup=auto_cleanup)
-
-        elif args.mode == "inventory":
-            inv_args = [args.target_dir]
-            pycnet.file.inventoryFolder(*inv_args)
-
-        elif args.mode == "rename":
-            rename_args = [args.target_dir, "wav"]
-            pycnet.file.massRenameFiles(*rename_args)
-            
-        elif args.mode == "cleanup":
-            cleanup_args = [args.target_dir, args.image_dir]
-            pycnet.file.removeSpectroDir(*cleanup_args)
-
-        else:
-            pass
+        mode_func, mode_args, mode_kwargs = mode_funcs[args.mode]
+        mode_func(*mode_args, **mode_kwargs)
 
 if __name__ == "__main__":
     main()
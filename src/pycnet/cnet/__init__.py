@@ -21,13 +21,13 @@ Exports:
         Pandas.DataFrame listing the v4 and v5 class code, description,
         category, subcategory, taxonomic Class, Order, Family, Genus, 
         Species, and binomial scientific name (where applicable) for 
-        each target class / sonotype detected by PNW-Cnet.
+        each target class / sonotype detected by PNW-Cnet. Read from 
+        target_classes.csv the first time it is accessed.
 
 """
 
 import os
 import pathlib
-import pandas as pd
 
 
 PACKAGEDIR = pathlib.Path(__file__).parent.absolute()
@@ -38,7 +38,15 @@ v5_model_path = os.path.join(PACKAGEDIR, "PNW-Cnet_v5_TF.h5")
 
 
 target_class_file = os.path.join(PACKAGEDIR, "target_classes.csv")
-target_classes = pd.read_csv(target_class_file)
+
+
+def __getattr__(name):
+    """Read the target class table only when it is first requested."""
+    if name == "target_classes":
+        import pandas as pd
+        globals()["target_classes"] = pd.read_csv(target_class_file)
+        return globals()["target_classes"]
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
 
 
 v4_class_names = ['AEAC', 'BRCA', 'BRMA', 'BUVI', 'CAGU', 'CALU', 'CAUS',
@@ -16,6 +16,10 @@ Functions:
         Return the location of a file relative to a higher-level
         folder.
 
+    getRenamed
+        Check which files in a rename log currently have their new 
+        names.
+
     inventoryFolder
         Inventory .wav files in a folder and write the info to a file.
 
@@ -26,6 +30,9 @@ Functions:
         Rename files with a given extension in a directory tree (or 
         undo this operation if previously performed).
 
+    readWavInventory
+        Read a .wav inventory file written by inventoryFolder.
+
     removeSpectroDir
         Recursively remove temporary files and folders.
 
@@ -39,17 +46,24 @@ Functions:
 
 import datetime as dt
 import os
+import shutil
 import wave
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from . import image
 from . import wav
 
 
-def findFiles(top_dir, file_ext):
+def findFiles(top_dir, file_ext, return_sizes=False):
     """List all files with a given extension in a directory tree.
 
+    The directory tree is traversed iteratively using os.scandir, which
+    avoids an extra stat call for each entry, and filenames are matched
+    with a simple suffix comparison.
+
     Args:
 
         top_dir (str): Path to the root of the directory tree to be 
@@ -58,18 +72,42 @@ def findFiles(top_dir, file_ext):
         file_ext (str): File extension of files to look for. A leading 
             dot (.) is not necessary but will not hurt anything.
 
+        return_sizes (bool): Whether to also return the size of each 
+            file, taken from the directory entry found during the 
+            traversal.
+
     Returns:
 
         list[str]: A sorted list of paths to files with extension 
-        file_ext in the directory tree rooted at top_dir.
+        file_ext in the directory tree rooted at top_dir. If 
+        return_sizes is True, a tuple of this list and a list of the
+        corresponding file sizes in bytes.
     """
 
-    files_found = []
-    for root, dirs, files in os.walk(top_dir):
-        for file in files:
-            if file.split('.')[-1] == file_ext.replace('.', ''):
-                files_found.append(os.path.join(root, file))
-    return sorted(files_found)
+    suffix = '.' + file_ext.lstrip('.')
+    file_paths, file_sizes, to_scan = [], [], [top_dir]
+
+    while to_scan:
+        # Like os.walk, skip directories that cannot be listed.
+        try:
+            entries = os.scandir(to_scan.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    to_scan.append(entry.path)
+                elif entry.name.endswith(suffix) and entry.is_file():
+                    file_paths.append(entry.path)
+                    if return_sizes:
+                        file_sizes.append(entry.stat().st_size)
+
+    if not return_sizes:
+        file_paths.sort()
+        return file_paths
+
+    path_order = sorted(range(len(file_paths)), key=file_paths.__getitem__)
+    return [file_paths[i] for i in path_order], [file_sizes[i] for i in path_order]
 
 
 def getFileSize(file_path, units='gb'):
@@ -119,9 +157,37 @@ def getFolder(file_path, top_dir):
     return file_folder
 
 
-def makeFileInventory(path_list, top_dir, use_abs_path=False):
+def getRenamed(rename_log_df):
+    """Check which files in a rename log currently have their new names.
+
+    Args:
+
+        rename_log_df (Pandas.DataFrame): DataFrame listing the 
+            directory, old filenames, and new filenames for a set of 
+            files, as written to Rename_Log.csv by massRenameFiles.
+
+    Returns:
+
+        Pandas.Series: Boolean Series that is True for each file whose
+        new name differs from its old name, and which exists under its
+        new name but not its old name.
+    """
+
+    dirs = rename_log_df["Folder"].astype(str) + os.sep
+    old_exists = (dirs + rename_log_df["Old_Name"]).map(os.path.exists)
+    new_exists = (dirs + rename_log_df["New_Name"]).map(os.path.exists)
+    changed = rename_log_df["Old_Name"] != rename_log_df["New_Name"]
+    return changed & new_exists & ~old_exists
+
+
+def makeFileInventory(path_list, top_dir, use_abs_path=False, file_sizes=None):
     """Build a table of basic attributes for a list of files.
 
+    The durations of .wav files are read by a pool of threads, since 
+    reading the file headers is dominated by disk latency. The Folder 
+    column is stored as a categorical, since many files share each
+    folder.
+
     Args:
 
         path_list (list): List of paths of files to be examined.
@@ -133,35 +199,67 @@ def makeFileInventory(path_list, top_dir, use_abs_path=False):
             folder containing each file in the Folder column of the 
             resulting DataFrame.
 
+        file_sizes (list): Optional sizes in bytes of the files in 
+            path_list, e.g. as returned by findFiles. If not supplied,
+            each file's size is looked up separately.
+
     Returns:
 
         Pandas.DataFrame: DataFrame with one row for each .wav file 
         listing its folder (absolute or relative to top_dir), filename,
-        size in bytes, and duration in seconds.
+        size in bytes, and duration in seconds (NaN for files that are
+        not .wav files).
     """
 
-    top_path = Path(top_dir)
+    n_files = len(path_list)
+    folders = np.empty(n_files, dtype=object)
+    filenames = np.empty(n_files, dtype=object)
+    sizes = np.empty(n_files, dtype=np.int64) if file_sizes is None else np.asarray(file_sizes, dtype=np.int64)
+    durations = np.full(n_files, np.nan)
 
-    file_dict = {"Folder":[], "Filename":[], "Size":[], "Duration":[]}
+    wav_idx = [i for i in range(n_files) if os.path.splitext(path_list[i])[1] == ".wav"]
+    n_threads = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        durations[wav_idx] = list(executor.map(lambda i: wav.getWavLength(path_list[i], 's'), wav_idx))
 
-    for path in path_list:
-        file_path = Path(path)
-        if use_abs_path:
-            file_dict["Folder"].append(file_path.parent)
-        else:
-            file_dict["Folder"].append(getFolder(path, top_dir))
-        file_dict["Filename"].append(os.path.basename(path))
-        file_dict["Size"].append(getFileSize(path, 'b'))
-        if file_path.suffix == ".wav":
-            file_dict["Duration"].append(wav.getWavLength(path, 's'))
-        else:
-            file_dict["Duration"].append("NA")
+    # Files in the same folder share a relative path, so only compute it once per folder
+    rel_folders = {}
+    for i in range(n_files):
+        file_dir, filenames[i] = os.path.split(path_list[i])
+        if file_dir not in rel_folders:
+            rel_folders[file_dir] = file_dir if use_abs_path else os.path.relpath(file_dir, top_dir)
+        folders[i] = rel_folders[file_dir]
+        if file_sizes is None:
+            sizes[i] = os.path.getsize(path_list[i])
 
-    file_df = pd.DataFrame(data = file_dict)
+    file_df = pd.DataFrame(data={"Folder":pd.Categorical(folders), "Filename":filenames, "Size":sizes, "Duration":durations}, copy=False)
 
     return file_df
 
 
+def readWavInventory(inv_file):
+    """Read a .wav inventory file written by inventoryFolder.
+
+    The type of each column is specified up front, which lets pandas 
+    skip type inference when parsing the file and ensures that folder
+    names which look like numbers are still read as text. The Folder 
+    column is read as a categorical, matching makeFileInventory.
+
+    Args:
+
+        inv_file (str): Path to the inventory CSV file.
+
+    Returns:
+
+        Pandas.DataFrame: DataFrame listing the folder, filename, size,
+        and duration of each .wav file.
+    """
+
+    inv_dtypes = {"Folder": "category", "Filename": str, "Size": np.int64, "Duration": np.float64}
+    wav_inventory = pd.read_csv(inv_file, dtype=inv_dtypes)
+    return wav_inventory
+
+
 def summarizeInventory(wav_inventory):
     """Summarize a table of info on .wav files in human-readable form.
 
@@ -212,8 +310,8 @@ def inventoryFolder(target_dir, write_file=True, print_summary=True):
         dir_name = os.path.basename(target_dir)
         inv_file = os.path.join(target_dir, "{0}_wav_inventory.csv".format(dir_name))
 
-        wav_paths = findFiles(target_dir, ".wav")
-        wav_inventory = makeFileInventory(wav_paths, target_dir)
+        wav_paths, wav_sizes = findFiles(target_dir, ".wav", return_sizes=True)
+        wav_inventory = makeFileInventory(wav_paths, target_dir, file_sizes=wav_sizes)
 
         if print_summary:
             summarizeInventory(wav_inventory)
@@ -262,7 +360,7 @@ def buildFilename(file_path, prefix=''):
     try:
         stamp = dt.datetime.strptime(str_stamp, stamp_fmt)
         new_stamp = str_stamp
-    except:
+    except ValueError:
         stamp = dt.datetime.fromtimestamp(os.path.getmtime(file_path))
         new_stamp = stamp.strftime(stamp_fmt)
     
@@ -288,41 +386,44 @@ def renameFiles(rename_log_df, revert=False):
 
         int: The number of files that were successfully renamed, or -1
         if the renaming operation would have resulted in duplicate 
-        filenames.
+        filenames. Files that cannot be renamed are reported and 
+        skipped.
     """
 
-    n_files = len(rename_log_df)
-    dirs = rename_log_df["Folder"]
-    old_names = rename_log_df["Old_Name"]
-    new_names = rename_log_df["New_Name"]
-    
-    old_paths, new_paths = [], []
-    
-    for i in range(n_files):
-        old_paths.append(os.path.join(dirs[i], old_names[i]))
-        new_paths.append(os.path.join(dirs[i], new_names[i]))
+    if rename_log_df["New_Name"].duplicated().any():
+        return -1
+
+    dirs = rename_log_df["Folder"].astype(str) + os.sep
+    old_paths = (dirs + rename_log_df["Old_Name"]).to_numpy()
+    new_paths = (dirs + rename_log_df["New_Name"]).to_numpy()
     
     rename_from = new_paths if revert else old_paths
     rename_to = old_paths if revert else new_paths
-    
-    if len(set(new_names)) < n_files:
-        return -1
-    else:
-        rename_count = 0
-        for i in range(n_files):
-            if rename_from[i] != rename_to[i]:
-                os.rename(rename_from[i], rename_to[i])
-                rename_count += 1
-            else:
-                continue
-        return rename_count
+    to_rename = np.flatnonzero(rename_from != rename_to)
+
+    def renameFile(i):
+        try:
+            os.rename(rename_from[i], rename_to[i])
+        except OSError as e:
+            return e
+
+    # Renaming is bound by filesystem latency, so overlap the calls.
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        rename_errors = [e for e in executor.map(renameFile, to_rename) if e is not None]
+
+    for e in rename_errors:
+        print("Could not rename file: {0}".format(e))
+
+    return len(to_rename) - len(rename_errors)
 
 
 def massRenameFiles(top_dir, extension, prefix=''):
     """Rename all files with a given extension in a directory tree.
 
     Runs in 'undo mode' if a file called Rename_Log.csv already exists 
-    in the directory provided.
+    in the directory provided. The log is written before any files are
+    renamed and then updated to list only the files that were actually
+    renamed, so a failed or interrupted operation can still be undone.
 
     Args:
 
@@ -345,8 +446,13 @@ def massRenameFiles(top_dir, extension, prefix=''):
         rename_log_df = pd.read_csv(rename_log_path)
         print("\nRename_Log.csv already exists. Reverting previously renamed files...\n")
         renameFiles(rename_log_df, revert=True)
-        print("Filenames reverted. Rename_Log.csv removed.\n")
-        os.remove(rename_log_path)
+        not_reverted = rename_log_df[getRenamed(rename_log_df)]
+        if not_reverted.empty:
+            print("Filenames reverted. Rename_Log.csv removed.\n")
+            os.remove(rename_log_path)
+        else:
+            not_reverted.to_csv(rename_log_path, index=False)
+            print("{0} files could not be reverted and remain listed in Rename_Log.csv.\n".format(len(not_reverted)))
     else:
         to_rename = findFiles(top_dir, extension)
         n_files = len(to_rename)
@@ -373,14 +479,26 @@ def massRenameFiles(top_dir, extension, prefix=''):
     
         rename_log_df = pd.DataFrame(data={"Folder":folders, "Old_Name":old_names, "New_Name":new_names, "Changed":changed})
         
+        n_changed = changed.count('Y')
+        if n_changed > 0:
+            rename_log_df.to_csv(rename_log_path, index=False)
+
         rename_count = renameFiles(rename_log_df, revert=False)
         
         if rename_count == -1:
+            if n_changed > 0:
+                os.remove(rename_log_path)
             print("\nRenaming would result in duplicate filenames!\n")
             print("Renaming operation canceled.\n")
-        elif rename_count == 0:
+        elif n_changed == 0:
             print("\nAll filenames are correct. No files were renamed.\n")
+        elif rename_count == 0:
+            os.remove(rename_log_path)
+            print("\nNone of the {0} files needing new names could be renamed.\n".format(n_changed))
         else:
+            not_renamed = (rename_log_df["Changed"] == 'Y') & ~getRenamed(rename_log_df)
+            rename_log_df.loc[not_renamed, "New_Name"] = rename_log_df.loc[not_renamed, "Old_Name"]
+            rename_log_df.loc[not_renamed, "Changed"] = 'N'
             print("\n{0} of {1} {2} files were renamed.\n".format(rename_count, n_files, extension))
             rename_log_df.to_csv(rename_log_path, index=False)
             print("Results written to {0}.\n".format(rename_log_path))
@@ -415,11 +533,7 @@ def removeSpectroDir(target_dir, spectro_dir=None):
         print("Temporary folder not found.")
     else:
         print("Removing temporary folders...", end='')
-        if os.name == "nt":
-            os.system("rmdir /s /q {0}".format(os.path.dirname(image_dir)))
-        else: 
-            # os.name should be 'posix' on both Linux and MacOS 
-            os.system("rm -rf {0}".format(os.path.dirname(image_dir)))
+        shutil.rmtree(os.path.dirname(image_dir), ignore_errors=True)
         print(" done.\n")
     
     return
\ No newline at end of file
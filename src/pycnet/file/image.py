@@ -2,12 +2,22 @@
 
 Functions:
 
+    buildImageCache
+        Decode a set of spectrograms into a single uint8 array on disk.
+
     checkImageFile
         Verify that an image file can be loaded.
 
     checkImages
         Use a set of worker processes to check all the image files in a
         directory tree.
+
+    getCacheIndexEntry
+        Describe an image file for the index of an image cache.
+
+    readImageCache
+        Open a previously built image cache if it matches a set of 
+        spectrograms.
     
 Classes:
 
@@ -16,10 +26,12 @@ Classes:
 """
 
 import multiprocessing as mp
+import numpy as np
 import os
 import pycnet
 import sys
-from tensorflow.keras.preprocessing.image import load_img
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
 
 
 def checkImageFile(image_path):
@@ -34,6 +46,8 @@ def checkImageFile(image_path):
         bool: True if the image loaded successfully, otherwise False.
     """
 
+    from tensorflow.keras.preprocessing.image import load_img
+
     try:
         img = load_img(image_path)
         return True
@@ -96,6 +110,113 @@ def checkImages(top_dir, n_workers=0):
     return sorted(bad_imgs)
 
 
+def buildImageCache(image_paths, cache_path, n_workers=0):
+    """Decode a set of spectrograms into a single uint8 array on disk.
+
+    Each image is decoded once and stored as a 257 x 1000 array of 
+    8-bit pixel values in a .npy file, in the same order as 
+    image_paths. The filename, size, and modification time of each 
+    image are written to a companion "_index.txt" file so that the 
+    cache can be matched to the spectrograms it was built from. The 
+    index is only written once every image has been decoded, so a 
+    partially built cache is never mistaken for a valid one. Reading 
+    the cache is much 
+    cheaper than decoding the PNG files again, e.g. when processing the
+    same spectrograms with both versions of PNW-Cnet.
+
+    Args:
+
+        image_paths (list): List of paths to the spectrogram image 
+            files.
+
+        cache_path (str): Path to the .npy file to be created.
+
+        n_workers (int): Number of threads to use for decoding images.
+            Defaults to the number of logical CPU cores.
+
+    Returns:
+
+        numpy.memmap: The image data, memory-mapped from cache_path.
+    """
+
+    if n_workers == 0:
+        n_workers = mp.cpu_count()
+
+    index_path = os.path.splitext(cache_path)[0] + "_index.txt"
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    index_lines = [getCacheIndexEntry(path) for path in image_paths]
+    image_cache = np.lib.format.open_memmap(cache_path, mode="w+", dtype=np.uint8, shape=(len(image_paths), 257, 1000))
+
+    def decodeImage(i):
+        with Image.open(image_paths[i]) as img:
+            image_cache[i] = np.asarray(img.convert("L"))
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        list(executor.map(decodeImage, range(len(image_paths))))
+
+    image_cache.flush()
+
+    with open(index_path, 'w') as index_file:
+        index_file.write('\n'.join(index_lines))
+
+    return image_cache
+
+
+def readImageCache(cache_path, image_paths):
+    """Open an image cache if it matches a set of spectrograms.
+
+    Args:
+
+        cache_path (str): Path to a .npy file created by 
+            buildImageCache.
+
+        image_paths (list): List of paths to the spectrogram image 
+            files the cache should contain, in order.
+
+    Returns:
+
+        numpy.memmap: The image data, memory-mapped read-only from 
+        cache_path, or None if the cache does not exist, was built 
+        from a different set of images, or the images have changed 
+        since it was built.
+    """
+
+    index_path = os.path.splitext(cache_path)[0] + "_index.txt"
+    if not all([os.path.exists(cache_path), os.path.exists(index_path)]):
+        return None
+
+    with open(index_path) as index_file:
+        cached_entries = index_file.read().splitlines()
+
+    if cached_entries != [getCacheIndexEntry(path) for path in image_paths]:
+        return None
+
+    image_cache = np.load(cache_path, mmap_mode='r')
+    if image_cache.shape != (len(image_paths), 257, 1000):
+        return None
+
+    return image_cache
+
+
+def getCacheIndexEntry(image_path):
+    """Describe an image file for the index of an image cache.
+
+    Args:
+
+        image_path (str): Path to a spectrogram image file.
+
+    Returns:
+
+        str: The filename, size in bytes, and modification time (in 
+        nanoseconds) of the file, separated by tabs.
+    """
+
+    file_stat = os.stat(image_path)
+    return "{0}\t{1}\t{2}".format(os.path.basename(image_path), file_stat.st_size, file_stat.st_mtime_ns)
+
+
 class ImageChecker(mp.Process):
     """Worker that checks for bad image files.
     
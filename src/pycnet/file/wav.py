@@ -2,6 +2,9 @@
 
 Functions:
 
+    getSoxPath
+        Locate the SoX executable.
+
     getWavLength
         Measure the duration of a .wav file.
 
@@ -21,15 +24,49 @@ Classes:
 """
 
 import datetime as dt
+import functools
 import math
 import multiprocessing as mp
 import os
+import shutil
+import subprocess
 import wave
 from multiprocessing import JoinableQueue, Process, Queue
 
+import numpy as np
+
+
+@functools.lru_cache(maxsize=None)
+def getSoxPath():
+    """Locate the SoX executable.
+
+    If the SOX_PATH environment variable is set, it is used as either 
+    the path to the SoX executable or the folder containing it. 
+    Otherwise SoX is looked up on the system PATH. The result is cached
+    so the lookup only happens once per process.
+
+    Returns:
+
+        str: Path to the SoX executable, or None if it could not be 
+        found.
+    """
+
+    sox_path = os.environ.get("SOX_PATH")
+    if sox_path is None:
+        return shutil.which("sox")
+    elif os.path.isfile(sox_path):
+        return sox_path
+    else:
+        return shutil.which("sox", path=sox_path)
+
 
+@functools.lru_cache(maxsize=None)
 def getWavLength(wav_path, mode='h'):
     """Return the duration of a .wav file in hours or seconds. 
+
+    Results are cached, so asking for the duration of the same file 
+    again (e.g. when building SoX commands for a file that was just 
+    inventoried) does not reopen the file.
     
     Args:
     
@@ -61,7 +98,10 @@ def makeSoxCmds(wav_path, output_dir):
     """Generate SoX commands to create spectrograms from a .wav file.
     
     Generates a list of SoX commands to create spectrograms representing
-    segments of audio from the .wav file provided.
+    segments of audio from the .wav file provided. Each command is an 
+    argument list that can be passed to subprocess.run directly, so no 
+    shell has to be started to run it and paths containing spaces do 
+    not need to be quoted.
     
     Args:
     
@@ -72,9 +112,11 @@ def makeSoxCmds(wav_path, output_dir):
     
     Returns:
     
-        list[str]: A list of commands to be executed by SoX.
+        list[list[str]]: A list of commands to be executed by SoX, 
+        each in the form of a list of arguments.
     """
     
+    sox_path = getSoxPath() or "sox"
     wav_name = os.path.basename(wav_path)
     wav_length = getWavLength(wav_path, 's')
     n_segments = int(wav_length / 12) + 1
@@ -90,17 +132,22 @@ def makeSoxCmds(wav_path, output_dir):
             dur = 12
         png_name = wav_name.replace(wav_name[-4:], "_part_{0}.png".format(str(i).zfill(n_digits)))
         png_path = os.path.join(output_dir, png_name)
-        sox_cmd = 'sox "{0}" -V1 -n trim {1} {2} remix 1 rate 8k spectrogram -x 1000 -y 257 -z 90 -m -r -o {3}'.format(wav_path, offs, dur, png_path)
+        sox_cmd = [sox_path, wav_path, "-V1", "-n", "trim", str(offs), str(dur), "remix", "1", "rate", "8k", "spectrogram", "-x", "1000", "-y", "257", "-z", "90", "-m", "-r", "-o", png_path]
         sox_cmds.append(sox_cmd)
     return sox_cmds
 
 
-def makeSpectroDirList(wav_list, image_dir, n_chunks):
+def makeSpectroDirList(wav_list, image_dir, n_chunks, wav_durations=None):
     """Map input .wav files to multiple output directories.
     
     Divides the full list of .wav files to be processed into several
     chunks and designates a folder to hold spectrograms from each chunk 
     to facilitate parallel processing.
+
+    If the durations of the .wav files are supplied, files are assigned
+    to chunks based on their cumulative duration, so that each folder 
+    receives roughly the same number of spectrograms even when file 
+    lengths vary. Otherwise each chunk gets the same number of files.
     
     Args:
     
@@ -111,6 +158,9 @@ def makeSpectroDirList(wav_list, image_dir, n_chunks):
             be generated (in subfolders as needed).
         
         n_chunks (int): The number of subfolders to create.
+
+        wav_durations (array-like): Optional durations of the .wav 
+            files in wav_list, in seconds.
     
     Returns:
         
@@ -119,10 +169,21 @@ def makeSpectroDirList(wav_list, image_dir, n_chunks):
         that file will be generated.
     """
     
-    chunk_size = int(len(wav_list) / n_chunks) + 1
+    n_files = len(wav_list)
     n_digits = int(math.log10(n_chunks)) + 1
-    wav_chunks = [int(i / chunk_size) + 1 for i in range(len(wav_list))]
-    dst_dirs = [os.path.join(image_dir, "part_{0}".format(str(j).zfill(n_digits))) for j in wav_chunks]
+    chunk_dirs = [os.path.join(image_dir, "part_{0}".format(str(j).zfill(n_digits))) for j in range(1, n_chunks + 1)]
+
+    durations = None if wav_durations is None else np.nan_to_num(np.asarray(wav_durations, dtype=np.float64))
+    if durations is not None and durations.sum() > 0:
+        start_times = np.cumsum(durations) - durations
+        wav_chunks = (start_times * n_chunks // durations.sum()).astype(np.int64)
+        # Trailing zero-length files start at the very end of the last chunk
+        wav_chunks = np.minimum(wav_chunks, n_chunks - 1)
+    else:
+        chunk_size = int(n_files / n_chunks) + 1
+        wav_chunks = np.arange(n_files) // chunk_size
+
+    dst_dirs = [chunk_dirs[j] for j in wav_chunks]
     wav_key = list(zip(wav_list, dst_dirs))
     return wav_key
 
@@ -134,22 +195,25 @@ class WaveWorker(Process):
     in_queue, consisting of a .wav file and an output directory. 
     It will create a set of sox commands to generate a set of 
     spectrograms from the .wav file in the output directory, then 
-    execute those commands sequentially using os.system. When finished,
-    the path to the .wav file will be placed in done_queue.
+    execute those commands sequentially using subprocess.run (without 
+    starting a shell for each command). When finished, the shared
+    done_counter will be incremented. If a file cannot be processed,
+    the error is reported and the worker moves on to the next file, so
+    the queue can still be joined.
     
     Attributes:
         
         in_queue (Multiprocessing.JoinableQueue): Queue containing 
             tuples in the format (wav_path, output_dir).
         
-        done_queue (Multiprocessing.Queue): Queue to hold paths to .wav
-            files that have already been processed.
+        done_counter (Multiprocessing.Value): Shared integer counting 
+            the .wav files that have already been processed.
         
         output_dir (str): Path to the directory where spectrograms 
             should be generated.
     """
 
-    def __init__(self, in_queue, done_queue, output_dir):
+    def __init__(self, in_queue, done_counter, output_dir):
         """Initializes the instance with input and output queues.
         
         Args:
@@ -158,8 +222,8 @@ class WaveWorker(Process):
                 input data in the form of tuples (wav_path, 
                 output_dir). 
             
-            done_queue (multiprocessing.Queue: Queue where paths to 
-                .wav files that have already been processed should go.
+            done_counter (multiprocessing.Value): Shared integer to be
+                incremented each time a .wav file has been processed.
             
             output_dir (str): Path to the directory where spectrograms
                 should be generated.
@@ -167,15 +231,20 @@ class WaveWorker(Process):
 
         Process.__init__(self)
         self.in_queue = in_queue
-        self.done_queue = done_queue
+        self.done_counter = done_counter
         self.output_dir = output_dir
 
 
     def run(self):
         while True:
             wav_path, spectro_dir = self.in_queue.get()
-            sox_cmds = makeSoxCmds(wav_path, spectro_dir)
-            for i in sox_cmds:
-                os.system(i)
-            self.in_queue.task_done()
-            self.done_queue.put(wav_path)
\ No newline at end of file
+            try:
+                sox_cmds = makeSoxCmds(wav_path, spectro_dir)
+                for i in sox_cmds:
+                    subprocess.run(i)
+            except Exception as e:
+                print("\nCould not generate spectrograms from {0}: {1}".format(wav_path, e))
+            finally:
+                self.in_queue.task_done()
+                with self.done_counter.get_lock():
+                    self.done_counter.value += 1
\ No newline at end of file
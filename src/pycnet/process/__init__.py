@@ -3,6 +3,10 @@ audio data using PNW-Cnet.
 
 Functions:
 
+    buildPycnetArgParser
+        Build the command-line argument parser for the 'pycnet' 
+        console script.
+
     buildProcQueue
         Create a JoinableQueue defining .wav files to be processed and 
         the directories where temporary spectrogram image files will be
@@ -23,9 +27,16 @@ Functions:
         Reconstruct absolute paths to .wav files listed in a DataFrame 
         containing filenames and relative paths.
 
+    loadCnetModel
+        Load a trained PNW-Cnet model, reusing it if already loaded.
+
     logMessage
         Print a message and optionally write it to a log file.
 
+    makeMixedPrecisionModel
+        Rebuild a trained PNW-Cnet model to run with float16 
+        arithmetic.
+
     makeFileInventory
         Build an inventory of .wav files in the target folder.
 
@@ -38,11 +49,14 @@ Functions:
 
 import argparse
 import datetime as dt
+import functools
+import math
 import multiprocessing as mp
+import numpy as np
 import os
 import pandas as pd
 import pycnet
-import tensorflow as tf
+import threading
 
 from pycnet.cnet import v4_class_names, v5_class_names, v4_model_path, v5_model_path
 
@@ -66,18 +80,24 @@ def getWavPaths(wav_inventory, top_dir):
     """
     
     wi = wav_inventory
+    rel_paths = wi["Folder"].astype(str) + os.sep + wi["Filename"].astype(str)
     if os.path.exists(wi["Folder"][0]):
-        wav_paths = [os.path.join(wi["Folder"][i], wi["Filename"][i]) for i in range(len(wi))]
+        wav_paths = rel_paths.tolist()
     else:
-        wav_paths = [os.path.join(top_dir, wi["Folder"][i], wi["Filename"][i]) for i in range(len(wi))]
+        wav_paths = (os.path.join(top_dir, '') + rel_paths).tolist()
     return wav_paths
 
 
-def buildProcQueue(input_dir, image_dir, n_chunks=0):
+def buildProcQueue(input_dir, image_dir, n_chunks=0, wav_inventory=None):
     """Return a queue of input file paths mapped to output folders.
     
     If n_chunks is not supplied, the function will try to avoid 
     generating >50,000 image files in any one folder.
+
+    The queue is bounded and starts out empty; generateSpectrograms 
+    feeds the tasks into it from a background thread as workers take 
+    them, so large inventories are not all pickled into the queue up
+    front.
     
     Arguments:
         
@@ -89,34 +109,39 @@ def buildProcQueue(input_dir, image_dir, n_chunks=0):
         
         n_chunks (int): Number of subfolders to create for the 
             spectrograms.
+
+        wav_inventory (Pandas.DataFrame): Inventory of the .wav files 
+            in input_dir, as produced by makeFileInventory. If not 
+            supplied, it will be read from the inventory file in 
+            input_dir.
     
     Returns:
         
-        dict: A dictionary containing "queue" (the queue itself) and 
-        "spectro_dirs", a list of folders where spectrograms will be 
-        generated.
+        dict: A dictionary containing "queue" (the queue itself), 
+        "tasks", a list of tuples (wav_path, output_dir) to be fed into
+        the queue, and "dirs", a list of folders where spectrograms 
+        will be generated.
     """
     
-    dir_name = os.path.basename(input_dir)
-    inv_file = os.path.join(input_dir, "{0}_wav_inventory.csv".format(dir_name))
-    
-    wav_inventory = pd.read_csv(inv_file)
+    if wav_inventory is None:
+        dir_name = os.path.basename(input_dir)
+        inv_file = os.path.join(input_dir, "{0}_wav_inventory.csv".format(dir_name))
+        wav_inventory = pycnet.file.readWavInventory(inv_file)
+
     wav_paths = getWavPaths(wav_inventory, input_dir)
 
     total_dur = sum(wav_inventory["Duration"]) / 3600.
-    n_images = total_dur * 300
+    n_images = int(total_dur * 300)
     
     if n_chunks == 0:
-        n_chunks = int(n_images / 50000) + min(n_images % 50000, 1)
+        n_chunks = max(1, -(-n_images // 50000))
 
-    todo = pycnet.file.wav.makeSpectroDirList(wav_paths, image_dir, n_chunks)
-    spectro_dirs = list(set([k[1] for k in todo]))
+    todo = pycnet.file.wav.makeSpectroDirList(wav_paths, image_dir, n_chunks, wav_inventory["Duration"])
+    spectro_dirs = list(dict.fromkeys(k[1] for k in todo))
 
-    proc_queue = mp.JoinableQueue()
-    for wav in todo:
-        proc_queue.put(wav)
+    proc_queue = mp.JoinableQueue(maxsize=2 * mp.cpu_count())
 
-    return {"queue":proc_queue, "dirs":spectro_dirs}
+    return {"queue":proc_queue, "tasks":todo, "dirs":spectro_dirs}
 
 
 def generateSpectrograms(proc_queue, n_workers, show_prog=True):
@@ -124,10 +149,11 @@ def generateSpectrograms(proc_queue, n_workers, show_prog=True):
 
     Arguments:
 
-        proc_queue (Multiprocessing.JoinableQueue): A joinable queue 
-            containing tuples mapping paths of .wav audio files to 
-            folders where the spectrograms generated from each .wav 
-            file should be saved.
+        proc_queue (dict): A dictionary as produced by buildProcQueue,
+            containing a joinable queue, the tasks (tuples mapping 
+            paths of .wav audio files to folders where the spectrograms
+            generated from each .wav file should be saved) to be fed 
+            into it, and the list of output folders.
 
         n_workers (int): Number of worker processes to use for 
             spectrogram generation.
@@ -141,39 +167,60 @@ def generateSpectrograms(proc_queue, n_workers, show_prog=True):
     """
 
     wav_queue = proc_queue["queue"]
-    n_wav_files = wav_queue.qsize()
+    wav_tasks = proc_queue["tasks"]
+    n_wav_files = len(wav_tasks)
     
     spectro_dirs = proc_queue["dirs"]
     for dir in spectro_dirs:
-        if not os.path.exists(dir):
-            os.makedirs(dir)
+        os.makedirs(dir, exist_ok=True)
 
     image_dir = os.path.commonpath(spectro_dirs)
-    done_queue = mp.Queue()
+    done_counter = mp.Value('i', 0)
 
     for i in range(n_workers):
-        worker = pycnet.file.wav.WaveWorker(wav_queue, done_queue, image_dir)
+        worker = pycnet.file.wav.WaveWorker(wav_queue, done_counter, image_dir)
         worker.daemon = True
         worker.start()
 
+    def feedQueue():
+        for task in wav_tasks:
+            wav_queue.put(task)
+
+    feeder = threading.Thread(target=feedQueue, daemon=True)
+    feeder.start()
+
     if show_prog:
-        prog_worker = pycnet.prog.ProgBarWorker(done_queue, n_wav_files)
+        prog_worker = pycnet.prog.ProgBarWorker(done_counter, n_wav_files)
         prog_worker.daemon = True
         prog_worker.start()
 
+    # The queue can be momentarily empty while the feeder is still 
+    # running, so wait for every task to be queued before joining it.
+    feeder.join()
     wav_queue.join()
 
     return
 
 
-def batchImageData(target_dir, batch_size=16):
+def batchImageData(target_dir, batch_size=16, cache_file=None, scale_images=True):
     """Supply batches of image data from a folder for classification.
 
     This function searches the target directory for image files with a
     .png file extension and chunks them up into batches to be supplied
-    to the PNW-Cnet model. Images are loaded in batches and converted 
-    to NumPy arrays with pixel values rescaled to floating-point values
-    in the range [0,1].
+    to the PNW-Cnet model. Images are read and decoded by a tf.data 
+    pipeline, which decodes several images in parallel and prepares 
+    the next batch while the model is busy with the current one. Images
+    stay as 8-bit integers until a whole batch has been assembled, and 
+    the batch is then rescaled to floating-point values in the range 
+    [0,1] in a single operation, unless scale_images is False, in which
+    case the caller is responsible for rescaling.
+    Images are expected to be 257 x 1000 grayscale spectrograms as 
+    produced by pycnet, so no resizing is done.
+
+    If cache_file is provided, the images are instead read from a 
+    uint8 image cache (see pycnet.file.image.buildImageCache), which 
+    will be built first if it does not exist or does not match the 
+    images in target_dir.
 
     Args:
 
@@ -183,42 +230,155 @@ def batchImageData(target_dir, batch_size=16):
             Larger batches may allow faster processing at the cost of
             increased memory usage.
 
+        cache_file (str): Path to a .npy image cache file, or None to 
+            decode the .png files directly.
+
+        scale_images (bool): Whether to rescale batches to float32 
+            values in [0,1]. If False, batches are supplied as uint8.
+
     Returns:
     
         dict: A dict containing "image_paths", a list of the full paths
         of all .png images in the target directory; "image_names", a 
         list of the filenames of the same files; and "image_batches", 
-        a Keras DataFrameIterator.
+        a tf.data.Dataset yielding batches of image data in the same 
+        order as image_paths.
     """
 
+    import tensorflow as tf
+
     image_paths = pycnet.file.findFiles(target_dir, ".png")
     image_names = [os.path.basename(path) for path in image_paths]
-    image_df = pd.DataFrame(data=image_paths, columns=["Filename"])
-
-    image_generator = tf.keras.preprocessing.image.ImageDataGenerator(
-        rescale = 1./255)
-
-    image_batches = image_generator.flow_from_dataframe(
-        dataframe = image_df,
-        directory = None,
-        x_col = "Filename",
-        y_col = None,
-        target_size = (257, 1000),
-        color_mode = 'grayscale',
-        batch_size = batch_size,
-        class_mode = None,
-        shuffle = False)
+
+    autotune = tf.data.experimental.AUTOTUNE
+
+    def scaleBatch(batch):
+        return tf.cast(batch, tf.float32) * (1. / 255.)
+
+    if cache_file is None:
+        def loadImage(image_path):
+            image = tf.io.decode_png(tf.io.read_file(image_path), channels=1)
+            image.set_shape([257, 1000, 1])
+            return image
+
+        image_batches = (tf.data.Dataset.from_tensor_slices(tf.constant(image_paths, dtype=tf.string))
+            .map(loadImage, num_parallel_calls=autotune)
+            .batch(batch_size))
+
+    else:
+        image_cache = pycnet.file.image.readImageCache(cache_file, image_paths)
+        if image_cache is None:
+            image_cache = pycnet.file.image.buildImageCache(image_paths, cache_file)
+
+        def loadCachedBatch(batch_indices):
+            batch = tf.numpy_function(lambda k: image_cache[k[0]:k[-1] + 1], [batch_indices], tf.uint8)
+            batch.set_shape([None, 257, 1000])
+            return tf.expand_dims(batch, -1)
+
+        image_batches = (tf.data.Dataset.range(len(image_paths))
+            .batch(batch_size)
+            .map(loadCachedBatch, num_parallel_calls=autotune))
+
+    if scale_images:
+        image_batches = image_batches.map(scaleBatch, num_parallel_calls=autotune)
+    image_batches = image_batches.prefetch(autotune)
 
     return {"image_paths": image_paths, "image_names": image_names, "image_batches": image_batches}
 
 
-def generateClassScores(target_dir, model_path, show_prog=True):
+loaded_models = {}
+
+
+def loadCnetModel(model_path, use_fp16=False):
+    """Load a trained PNW-Cnet model, reusing it if already loaded.
+
+    Loading a model from its .h5 file takes several seconds, so models
+    are kept in the loaded_models dictionary after the first load and 
+    reused by later calls in the same Python session (e.g. when 
+    processing several folders in one script).
+
+    Args:
+
+        model_path (str): Path to either the PNW-Cnet v4 or v5 trained
+            model file.
+
+        use_fp16 (bool): Whether to return a copy of the model that 
+            uses mixed float16 precision (see makeMixedPrecisionModel).
+
+    Returns:
+
+        tf.keras.Model: The trained model.
+    """
+
+    import tensorflow as tf
+
+    model_key = (model_path, use_fp16)
+    if model_key not in loaded_models:
+        # Spits out a few informational and warning messages which can be safely ignored.
+        cnet_model = tf.keras.models.load_model(model_path)
+        if use_fp16:
+            cnet_model = makeMixedPrecisionModel(cnet_model)
+        loaded_models[model_key] = cnet_model
+    return loaded_models[model_key]
+
+
+def makeMixedPrecisionModel(cnet_model):
+    """Rebuild a trained PNW-Cnet model to run with float16 arithmetic.
+
+    The layers of the saved models record their own float32 dtype, so 
+    setting a global Keras policy before loading has no effect. Instead
+    the model is cloned with every layer set to the "mixed_float16" 
+    policy (float16 computations, float32 weights) and the trained 
+    weights are copied over. The output layer is kept in float32 so 
+    the class scores are numerically identical in format to those from
+    the original model.
+
+    Mixed precision is only faster on GPUs with float16 support (e.g. 
+    NVIDIA tensor cores); on a CPU it will usually be slower.
+
+    Args:
+
+        cnet_model (tf.keras.Model): A trained PNW-Cnet model.
+
+    Returns:
+
+        tf.keras.Model: A copy of the model using mixed precision.
+    """
+
+    import tensorflow as tf
+
+    mixed_policy = tf.keras.mixed_precision.experimental.Policy("mixed_float16")
+    output_layer = cnet_model.layers[-1]
+
+    def cloneLayer(layer):
+        layer_config = layer.get_config()
+        layer_config["dtype"] = "float32" if layer is output_layer else mixed_policy
+        return layer.__class__.from_config(layer_config)
+
+    mixed_model = tf.keras.models.clone_model(cnet_model, clone_function=cloneLayer)
+    mixed_model.set_weights(cnet_model.get_weights())
+    return mixed_model
+
+
+def generateClassScores(target_dir, model_path, show_prog=True, batch_size=None, use_fp16=False, cache_file=None, use_xla=False, score_file=None):
     """Generate class scores for a set of spectrograms using PNW-Cnet.
 
     The DataFrame returned contains one column Filename for the names 
     of the image files and either 51 (PNW-Cnet v4) or 135 (PNW-Cnet v5)
     columns for class scores.
 
+    Batches are passed directly to the model inside a tf.function 
+    rather than through model.predict, which avoids the per-call setup
+    overhead of predict. Batches are transferred to the model as uint8 
+    and rescaled inside that function, so the conversion to float runs
+    on the same device as the model and a quarter as much data crosses
+    from the input pipeline. Scores are collected in a single 
+    preallocated array, or appended to score_file one batch at a time
+    if it is provided, so that very large folders can be processed 
+    without holding every score in memory. If the input pipeline 
+    supplies fewer images than were found, a RuntimeError is raised 
+    rather than returning incomplete scores.
+
     Args:
 
         target_dir (str): Directory containing spectrograms in the form
@@ -231,26 +391,53 @@ def generateClassScores(target_dir, model_path, show_prog=True):
         show_prog (bool): Whether to show a text-based progress bar as 
             the model processes batches of images.
 
+        batch_size (int): Number of images to process in each batch. 
+            If None, uses 128 if a GPU is available and 16 otherwise.
+
+        use_fp16 (bool): Whether to run the model with mixed float16 
+            precision. See makeMixedPrecisionModel for details.
+
+        cache_file (str): Path to a .npy image cache to read images 
+            from (see batchImageData), or None to decode the .png files
+            directly.
+
+        use_xla (bool): Whether to compile the model's forward pass 
+            with XLA, which fuses convolutions, bias additions and 
+            activations into fewer kernels. Compilation adds some 
+            startup time, so this mainly pays off for large folders.
+
+        score_file (str): Path to a CSV file to which class scores 
+            will be written as they are generated, or None to return 
+            them in a DataFrame.
+
     Returns:
 
         Pandas.DataFrame: A DataFrame containing the class scores for
-        each image file.
+        each image file, or None if the scores were written to 
+        score_file.
     """
 
-    i = batchImageData(target_dir)
+    import tensorflow as tf
+
+    if batch_size is None:
+        batch_size = 128 if tf.config.list_physical_devices("GPU") else 16
+
+    i = batchImageData(target_dir, batch_size, cache_file, scale_images=False)
     image_paths = i["image_paths"]
     image_names = i["image_names"]
     image_batches = i["image_batches"]
 
-    # Spits out a few informational and warning messages which can be safely ignored.
-    pnw_cnet_model = tf.keras.models.load_model(model_path)
+    pnw_cnet_model = loadCnetModel(model_path, use_fp16)
 
-    class_scores = pnw_cnet_model.predict(image_batches, verbose = 1 if show_prog else 0)
+    @tf.function(experimental_relax_shapes=True, experimental_compile=use_xla)
+    def predictBatch(image_batch):
+        scaled_batch = tf.cast(image_batch, tf.float32) * (1. / 255.)
+        return pnw_cnet_model(scaled_batch, training=False)
 
     # Function applies different column labels depending on the number of columns
-    # (i.e., target classes) in the class_scores dataframe. If it gets an unexpected
+    # (i.e., target classes) in the model output. If it gets an unexpected
     # number of columns (neither 51 nor 135) it just labels them sequentially.
-    n_cols = class_scores.shape[1]
+    n_cols = pnw_cnet_model.output_shape[-1]
     if n_cols == 51:
         score_cols = v4_class_names
     elif n_cols == 135:
@@ -259,13 +446,46 @@ def generateClassScores(target_dir, model_path, show_prog=True):
         print("Warning: Prediction dataframe has unexpected number of columns. Cannot determine class names.")
         score_cols = ["Class_{0:03d}".format(i) for i in range(1, n_cols + 1)]
 
-    predictions = pd.DataFrame(data=class_scores, columns=score_cols).round(decimals=5)
+    n_images = len(image_paths)
+    n_batches = math.ceil(n_images / batch_size)
+    prog_step = max(1, n_batches // 200)
+
+    if score_file is None:
+        class_scores = np.empty((n_images, n_cols), dtype=np.float32)
+    else:
+        pd.DataFrame(columns=["Filename"] + list(score_cols)).to_csv(score_file, index=False)
+
+    batch_end = 0
+    for j, image_batch in enumerate(image_batches):
+        batch_start = j * batch_size
+        batch_scores = predictBatch(image_batch).numpy()
+        batch_end = batch_start + batch_scores.shape[0]
+        if score_file is None:
+            class_scores[batch_start:batch_end] = batch_scores
+        else:
+            batch_df = pd.DataFrame(data=np.round(batch_scores, decimals=5), columns=score_cols, copy=False)
+            batch_df.insert(loc=0, column="Filename", value=image_names[batch_start:batch_end])
+            batch_df.to_csv(score_file, mode='a', header=False, index=False)
+        if show_prog and ((j + 1) % prog_step == 0 or j + 1 == n_batches):
+            print(pycnet.prog.makeProgBar(j + 1, n_batches), end='\r')
+
+    if show_prog and n_batches > 0:
+        print()
+
+    if batch_end != n_images:
+        raise RuntimeError("Generated class scores for {0} of {1} images.".format(batch_end, n_images))
+
+    if score_file is not None:
+        return
+
+    np.round(class_scores, decimals=5, out=class_scores)
+    predictions = pd.DataFrame(data=class_scores, columns=score_cols, copy=False)
     predictions.insert(loc=0, column="Filename", value=image_names)
 
     return predictions
 
 
-def generateEmbeddings(target_dir, cnet_version, show_prog=True):
+def generateEmbeddings(target_dir, cnet_version, show_prog=True, batch_size=None):
     """Generate embeddings for a set of images using PNW-Cnet.
 
     Embeddings are the activation of the penultimate fully-connected 
@@ -274,6 +494,9 @@ def generateEmbeddings(target_dir, cnet_version, show_prog=True):
     cluster analysis or other forms of dimensionality reduction, and 
     can also be used to train linear classifiers.
 
+    As in generateClassScores, uint8 batches are passed directly to the
+    model inside a tf.function rather than through model.predict.
+
     Args:
 
         target_dir (str): Directory containing spectrograms in the form
@@ -286,6 +509,9 @@ def generateEmbeddings(target_dir, cnet_version, show_prog=True):
         show_prog (bool): Whether to show a text-based progress bar as
             the model processes batches of images.
 
+        batch_size (int): Number of images to process in each batch.
+            If None, uses 128 if a GPU is available and 16 otherwise.
+
     Returns:
 
         dict: A dictionary containing two Pandas DataFrames. 
@@ -293,7 +519,12 @@ def generateEmbeddings(target_dir, cnet_version, show_prog=True):
         "embeddings" contains the embeddings for each image file.
     """
 
-    i = batchImageData(target_dir)
+    import tensorflow as tf
+
+    if batch_size is None:
+        batch_size = 128 if tf.config.list_physical_devices("GPU") else 16
+
+    i = batchImageData(target_dir, batch_size, scale_images=False)
     image_paths = i["image_paths"]
     image_names = i["image_names"]
     image_batches = i["image_batches"]
@@ -305,19 +536,42 @@ def generateEmbeddings(target_dir, cnet_version, show_prog=True):
     else:
         return
     
-    cnet_model = tf.keras.models.load_model(model_path)
+    cnet_model = loadCnetModel(model_path)
     embed_model = tf.keras.models.Model(inputs = cnet_model.input,
                                 outputs = {"class_scores": cnet_model.output,
                                             "embeddings": cnet_model.get_layer(embed_layer_name).output})
 
+    @tf.function(experimental_relax_shapes=True)
+    def embedBatch(image_batch):
+        scaled_batch = tf.cast(image_batch, tf.float32) * (1. / 255.)
+        return embed_model(scaled_batch, training=False)
+
     embed_cols = ["Node_{0:03d}".format(j) for j in range(embed_nodes)]
 
-    model_output = embed_model.predict(image_batches, verbose = 1 if show_prog else 0)
+    n_images = len(image_paths)
+    n_batches = math.ceil(n_images / batch_size)
+    prog_step = max(1, n_batches // 200)
+    class_scores = np.empty((n_images, len(class_names)), dtype=np.float32)
+    embed_values = np.empty((n_images, embed_nodes), dtype=np.float32)
+
+    for j, image_batch in enumerate(image_batches):
+        batch_output = embedBatch(image_batch)
+        batch_start = j * batch_size
+        batch_end = batch_start + batch_output["class_scores"].shape[0]
+        class_scores[batch_start:batch_end] = batch_output["class_scores"].numpy()
+        embed_values[batch_start:batch_end] = batch_output["embeddings"].numpy()
+        if show_prog and ((j + 1) % prog_step == 0 or j + 1 == n_batches):
+            print(pycnet.prog.makeProgBar(j + 1, n_batches), end='\r')
+
+    if show_prog and n_batches > 0:
+        print()
     
-    predictions = pd.DataFrame(data=model_output["class_scores"], columns=class_names).round(decimals=5)
+    np.round(class_scores, decimals=5, out=class_scores)
+    predictions = pd.DataFrame(data=class_scores, columns=class_names, copy=False)
     predictions.insert(loc=0, column="Filename", value=image_names)
     
-    embeddings = pd.DataFrame(data=model_output["embeddings"], columns=embed_cols).round(decimals=5)
+    np.round(embed_values, decimals=5, out=embed_values)
+    embeddings = pd.DataFrame(data=embed_values, columns=embed_cols, copy=False)
     embeddings.insert(loc=0, column="Filename", value=image_names)
 
     return {"predictions": predictions, "embeddings": embeddings}
@@ -345,7 +599,7 @@ def logMessage(message, log_file_path=None):
     return
 
 
-def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_workers=None, review_settings=None, output_file=None, log_to_file=False, show_prog=True, cleanup=False):
+def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_workers=None, review_settings=None, output_file=None, log_to_file=False, show_prog=True, cleanup=False, batch_size=None, use_fp16=False, use_xla=False, cache_file=None, stream_scores=False):
     """Perform one or more processing operations on data in a folder.
 
     Basically runs through the functions above in a logical sequence to
@@ -392,6 +646,26 @@ def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_worke
         cleanup (bool): Whether to delete spectrograms and temporary 
             folders when processing is complete.
 
+        batch_size (int): Number of images to classify in each batch. 
+            If None, a default is chosen based on whether a GPU is 
+            available (see generateClassScores).
+
+        use_fp16 (bool): Whether to run PNW-Cnet with mixed float16 
+            precision when generating class scores (see 
+            makeMixedPrecisionModel).
+
+        use_xla (bool): Whether to compile PNW-Cnet with XLA when 
+            generating class scores (see generateClassScores).
+
+        cache_file (str): Path to a .npy image cache to read 
+            spectrograms from when generating class scores. Built from
+            the spectrograms first if it does not exist or does not 
+            match them (see batchImageData).
+
+        stream_scores (bool): Whether to write class scores to the 
+            class score file as each batch is classified instead of 
+            holding them all in memory (see generateClassScores).
+
     Returns:
 
         Nothing.
@@ -414,6 +688,7 @@ def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_worke
     kscope_file = review_file.replace("review", "review_kscope")
 
     output_files = []
+    class_scores = None
 
     proc_start = dt.datetime.now()
 
@@ -430,7 +705,7 @@ def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_worke
         output_files.append(wav_inv_file)
     else:
         logMessage("Using preexisting .wav inventory file...", proc_log_file)
-        wav_inventory = pd.read_csv(wav_inv_file)
+        wav_inventory = pycnet.file.readWavInventory(wav_inv_file)
     
     logMessage('\n' + pycnet.file.summarizeInventory(wav_inventory) + '\n', proc_log_file)
 
@@ -443,6 +718,11 @@ def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_worke
     if mode in ["process", "spectro"]:
 
         # Check if it's possible to generate spectrograms
+        if pycnet.file.wav.getSoxPath() is None:
+            logMessage("\nCould not find SoX! Install SoX or set the SOX_PATH environment variable.", proc_log_file)
+            logMessage("Aborting operation.\n", proc_log_file)
+            exit()
+
         try:
             os.makedirs(image_dir)
         except:
@@ -450,7 +730,7 @@ def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_worke
             logMessage("Aborting operation.\n", proc_log_file)
             exit()
         
-        proc_queue = buildProcQueue(target_dir, image_dir)
+        proc_queue = buildProcQueue(target_dir, image_dir, wav_inventory=wav_inventory)
         logMessage("\nSpectrograms will be generated in the following folders:\n", proc_log_file)
         logMessage('\n'.join(sorted(proc_queue["dirs"])), proc_log_file)
         
@@ -481,10 +761,18 @@ def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_worke
             logMessage("\nGenerating class scores using PNW-Cnet {0}...\n".format(cnet_version), proc_log_file)
         
         model_path = v4_model_path if cnet_version == "v4" else v5_model_path
+
+        if batch_size is not None and int(batch_size) < 1:
+            logMessage("Cannot use a batch size of {0}. Using the default batch size.".format(batch_size), proc_log_file)
+            batch_size = None
+        elif batch_size is not None:
+            batch_size = int(batch_size)
         
-        class_scores = generateClassScores(image_dir, model_path, show_prog)
-        
-        class_scores.to_csv(class_score_file, index = False)
+        if stream_scores:
+            generateClassScores(image_dir, model_path, show_prog=show_prog, batch_size=batch_size, use_fp16=use_fp16, cache_file=cache_file, use_xla=use_xla, score_file=class_score_file)
+        else:
+            class_scores = generateClassScores(image_dir, model_path, show_prog=show_prog, batch_size=batch_size, use_fp16=use_fp16, cache_file=cache_file, use_xla=use_xla)
+            class_scores.to_csv(class_score_file, index = False)
         
         predict_end = dt.datetime.now()
         logMessage("\nFinished {0}.".format(predict_end.strftime(time_fmt)), proc_log_file)
@@ -492,9 +780,7 @@ def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_worke
 
     ### Summarize apparent detections and create review file ###
     if mode in ["process", "predict", "review"]:
-        try:
-            class_scores
-        except:
+        if class_scores is None:
             class_scores = pycnet.review.readPredFile(class_score_file)
 
         if not os.path.exists(det_sum_file):
@@ -513,7 +799,7 @@ def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_worke
             else:
                 review_settings =  pycnet.review.parseStrReviewCriteria(review_settings)
 
-        review_df = pycnet.review.makeKscopeReviewTable(class_scores, target_dir, cnet_version, review_settings)
+        review_df = pycnet.review.makeKscopeReviewTable(class_scores, target_dir, cnet_version, review_settings, wav_inventory=wav_inventory)
         logMessage(" done. {0} apparent detections found.\n".format(review_df.shape[0]), proc_log_file)
 
         review_df.to_csv(kscope_file, index=False)
@@ -539,17 +825,17 @@ def processFolder(mode, target_dir, cnet_version="v5", spectro_dir=None, n_worke
     return
 
 
-def parsePycnetArgs():
-    """Define command-line options for the 'pycnet' console script.
-
-    Args:
+@functools.lru_cache(maxsize=None)
+def buildPycnetArgParser():
+    """Build the argument parser for the 'pycnet' console script.
 
-        Nothing (reads arguments from stdin).
+    The parser is only constructed once per process and reused by later
+    calls.
 
     Returns:
 
-        argparse.Namespace: An argparse.Namespace object containing 
-        command-line arguments in an accessible form.
+        argparse.ArgumentParser: Parser defining the command-line 
+        options for the 'pycnet' console script.
     """
     
     n_cores = mp.cpu_count()
@@ -562,9 +848,24 @@ def parsePycnetArgs():
 
     parser.add_argument("target_dir", metavar="TARGET_DIR", type=str, help="Path to the directory containing .wav files to be processed.")
 
+    parser.add_argument("-b", dest="batch_size", type=int,
+        help="Number of images to classify at once when generating class scores. Default: 128 if a GPU is available, otherwise 16.")
+
     parser.add_argument("-c", dest="cnet_version", type=str, choices=["v4", "v5"], default="v5",
         help="Version of PNW-Cnet to use when generating class scores. Options: 'v5' (default) or 'v4'.")
 
+    parser.add_argument("-f", "--fp16", dest="use_fp16", action="store_true",
+        help="Run PNW-Cnet with mixed float16 precision when generating class scores. Faster on recent NVIDIA GPUs; no benefit on CPU.")
+
+    parser.add_argument("-x", "--xla", dest="use_xla", action="store_true",
+        help="Compile PNW-Cnet with XLA when generating class scores. Adds some startup time but can speed up large folders.")
+
+    parser.add_argument("-k", "--cache", dest="cache_file", type=str,
+        help="Path to a .npy file to cache spectrogram image data in when generating class scores. Built if it does not exist; reused if it matches the spectrograms.")
+
+    parser.add_argument("-s", "--stream", dest="stream_scores", action="store_true",
+        help="Write class scores to the class score file as they are generated instead of holding them in memory. Useful for very large folders.")
+
     parser.add_argument("-i", dest="image_dir", type=str,
         help="Path to the directory where spectrogram images will be stored. Will be created if it does not already exist. Default: a folder called Temp under target dir.")
 
@@ -586,6 +887,23 @@ def parsePycnetArgs():
     parser.add_argument("-a", dest="auto_cleanup", action="store_true",
         help="Remove spectrogram image files and temporary folders when class scores have been generated.")
 
-    args = parser.parse_args()
+    return parser
+
+
+def parsePycnetArgs(argv=None):
+    """Define command-line options for the 'pycnet' console script.
+
+    Args:
+
+        argv (list): Optional list of argument strings to parse. If 
+            None, arguments are read from the command line.
+
+    Returns:
+
+        argparse.Namespace: An argparse.Namespace object containing 
+        command-line arguments in an accessible form.
+    """
+
+    args = buildPycnetArgParser().parse_args(argv)
     
     return args
@@ -12,7 +12,7 @@ Classes:
 """
 
 import time
-from multiprocessing import Process, Queue
+from multiprocessing import Process
 
 
 def makeProgBar(done, total, width=30):
@@ -44,34 +44,38 @@ def makeProgBar(done, total, width=30):
 class ProgBarWorker(Process):
     """A worker that prints a text-based progress bar.
     
-    When running, the worker will regularly check the number of items
-    in done_queue, compute progress as a proportion of total_size, and
-    generate and print a text-based progress bar. When the size of 
-    done_queue equals total_size (i.e., all tasks are complete), the 
-    process stops.
+    When running, the worker will regularly check the value of 
+    done_counter, compute progress as a proportion of total_size, and 
+    generate and print a text-based progress bar whenever progress has
+    been made. When done_counter reaches total_size (i.e., all tasks 
+    are complete), the process stops.
+
+    Reading a shared counter is much cheaper than calling qsize() on a
+    queue, which takes a lock shared with the processes doing the 
+    actual work.
     
     Attributes:
 
-        done_queue (Multiprocessing.Queue): Queue to track completed 
-            tasks.
+        done_counter (Multiprocessing.Value): Shared integer counting 
+            completed tasks.
 
         total_size (int): Number of tasks to be performed.
     """
 
-    def __init__(self, done_queue, total_size):
+    def __init__(self, done_counter, total_size):
         """Initializes the instance with a set of tasks to monitor.
         
         Args:
         
-            done_queue (Multiprocessing.Queue): Queue listing items 
-                that have been completed.
+            done_counter (Multiprocessing.Value): Shared integer that 
+                is incremented as tasks are completed.
             
             total_size (int): The number of items that were on the 
                 to-do list initially.
         """
         
         Process.__init__(self)
-        self.done_queue = done_queue
+        self.done_counter = done_counter
         self.total_size = total_size
         self.done = 0
 
@@ -79,17 +83,13 @@ class ProgBarWorker(Process):
     def run(self):
         print(makeProgBar(0, self.total_size, 30), end='\r')
         while True:
-            n_done = self.done_queue.qsize()
-            progbar = makeProgBar(n_done, self.total_size, 30)
+            n_done = self.done_counter.value
 
-            if all([n_done != 0, n_done == self.done]):
-                # print('', end='\r')
-                continue
-            else:
-                print(progbar) #, end='\r')
+            if n_done != self.done:
+                print(makeProgBar(n_done, self.total_size, 30))
                 self.done = n_done
 
-            if n_done == self.total_size:
+            if n_done >= self.total_size:
                 break
             else:
                 time.sleep(2)
@@ -219,7 +219,7 @@ def getSourceFile(clip_name):
         return (source_file, str_part)
 
 
-def getSourceFolders(clip_list, top_dir):
+def getSourceFolders(clip_list, top_dir, wav_inventory=None):
     """Get locations of a set of files within a directory tree.
 
     This function will attempt to associate each spectrogram image
@@ -236,6 +236,11 @@ def getSourceFolders(clip_list, top_dir):
             containing the source .wav files. Values in the FOLDER 
             field will be generated relative to this directory.
 
+        wav_inventory (Pandas.DataFrame): Inventory of the .wav files 
+            in top_dir, as produced by pycnet.file.makeFileInventory. 
+            If not supplied, it will be read from the inventory file 
+            in top_dir, or created if that file does not exist.
+
     Returns:
 
         Pandas.DataFrame: DataFrame listing the folder (relative to 
@@ -247,12 +252,14 @@ def getSourceFolders(clip_list, top_dir):
     source_file_df = pd.DataFrame(data={"Filename": clip_list, "IN_FILE": source_file_list, "PART": part_list})
     
     wav_inv_path = os.path.join(top_dir, "{0}_wav_inventory.csv".format(os.path.basename(top_dir)))
-    if not os.path.exists(wav_inv_path):
+    if wav_inventory is not None:
+        wav_df = wav_inventory
+    elif not os.path.exists(wav_inv_path):
         wav_df = pycnet.file.inventoryFolder(top_dir)
     else:
-        wav_df = pd.read_csv(wav_inv_path)
+        wav_df = pycnet.file.readWavInventory(wav_inv_path)
 
-    wav_df.rename(columns={"Folder": "FOLDER", "Filename": "IN_FILE"}, inplace=True)
+    wav_df = wav_df.rename(columns={"Folder": "FOLDER", "Filename": "IN_FILE"})
 
     joined_df = source_file_df.merge(wav_df, how="left", on="IN_FILE")
     
@@ -358,7 +365,7 @@ def getDefaultReviewSettings(cnet_version):
 
     stoc_classes = ["STOC", "STOC_IRREG", "STOC_4Note", "STOC_Series"]
     class_names = v4_class_names if cnet_version == "v4" else v5_class_names
-    class_names.sort(key=lambda x: x in stoc_classes, reverse=True)
+    class_names = sorted(class_names, key=lambda x: x in stoc_classes, reverse=True)
     settings_dict = {}
     for i in class_names:
         if cnet_version == "v5":
@@ -582,7 +589,7 @@ def makeReviewTable(pred_table, cnet_version="v5", review_settings=None):
     return review_df
 
 
-def makeKscopeReviewTable(pred_table, target_dir, cnet_version="v5", review_settings=None, timescale="weekly"):
+def makeKscopeReviewTable(pred_table, target_dir, cnet_version="v5", review_settings=None, timescale="weekly", wav_inventory=None):
     """Extract & format apparent detections for review in Kaleidoscope.
 
     Args:
@@ -603,6 +610,9 @@ def makeKscopeReviewTable(pred_table, target_dir, cnet_version="v5", review_sett
         timescale (str): The temporal scale ("daily" or "weekly") at 
             which to tally the apparent detections of each class.
 
+        wav_inventory (Pandas.DataFrame): Optional inventory of the 
+            .wav files in target_dir. See getSourceFolders for details.
+
     Returns:
         
         Pandas.DataFrame: DataFrame listing apparent detections of one 
@@ -621,7 +631,7 @@ def makeKscopeReviewTable(pred_table, target_dir, cnet_version="v5", review_sett
     else:
         n_clips = review_df.shape[0]
 
-        source_df = getSourceFolders(review_df.Filename, target_dir)
+        source_df = getSourceFolders(review_df.Filename, target_dir, wav_inventory)
         output_df = review_df.merge(source_df, how="inner", on="Filename")
 
         output_df["OFFSET"] = [12*(int(p)-1) for p in output_df.Part]
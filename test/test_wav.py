@@ -0,0 +1,38 @@
+"""Tests for pycnet.file.wav."""
+
+import os
+import unittest
+
+from pycnet.file.wav import makeSpectroDirList
+
+
+class TestMakeSpectroDirList(unittest.TestCase):
+
+    def checkChunks(self, durations, n_chunks, expected_parts):
+        wav_list = ["{0}.wav".format(j) for j in range(len(durations))]
+        wav_key = makeSpectroDirList(wav_list, "images", n_chunks, durations)
+        expected_key = [(wav, os.path.join("images", "part_{0}".format(part))) for wav, part in zip(wav_list, expected_parts)]
+        self.assertEqual(wav_key, expected_key)
+
+    def test_binning_by_duration(self):
+        self.checkChunks([10., 10., 10., 10.], 2, [1, 1, 2, 2])
+        self.checkChunks([30., 10., 10., 10.], 2, [1, 2, 2, 2])
+        self.checkChunks([30., 30., 0.], 3, [1, 2, 3])
+
+    def test_trailing_zero_durations(self):
+        # Trailing empty files start at the total duration, which would
+        # map to chunk n_chunks without clamping to n_chunks - 1.
+        self.checkChunks([30., 0., 0.], 1, [1, 1, 1])
+        self.checkChunks([30., 0., 0.], 2, [1, 2, 2])
+        self.checkChunks([30., 0., 0.], 3, [1, 3, 3])
+        self.checkChunks([30., 30., 0.], 2, [1, 2, 2])
+        self.checkChunks([10., 10., 10., 10., 0.], 4, [1, 2, 3, 4, 4])
+
+    def test_trailing_nan_durations(self):
+        self.checkChunks([30., 30., float("nan")], 1, [1, 1, 1])
+        self.checkChunks([30., 30., float("nan")], 2, [1, 2, 2])
+        self.checkChunks([30., float("nan"), float("nan")], 3, [1, 3, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()